@@ -0,0 +1,395 @@
+"""Geometry and rendering of anchor bolt diagrams as SVG and PNG.
+
+The drawing is described once by :func:`build_primitives`; the SVG preview and
+the Matplotlib PNG are both produced from those primitives.
+"""
+
+import functools
+import io
+import threading
+from math import ceil, cos, log10, pi, radians, sin
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import matplotlib.patches as patches
+from matplotlib.collections import LineCollection
+from PIL import Image
+
+from drawing import (
+    SVG_HEADER,
+    fit_labels,
+    hatch_segments,
+    label_bounds,
+    label_font,
+    svg_arc_path,
+    svg_text,
+)
+
+# Conversion factors from different units to millimeters
+UNIT_TO_MM = {
+    "mm": 1.0,
+    "cm": 10.0,
+    "inches": 25.4,
+    "meters": 1000.0,
+    "feet": 304.8,
+}
+
+# Cache keys are rounded to this many decimals of a millimeter
+_CACHE_DECIMALS_MM = 3
+
+# A single Figure/Axes pair is reused for every render; building a new figure
+# per call dominates the cost of live updates.
+_FIG, _AX = plt.subplots(figsize=(5, 6), dpi=90)
+_FIG.subplots_adjust(left=0.05, right=0.95, top=0.95, bottom=0.05)
+_LOCK = threading.Lock()
+
+# Typical PNG size; writing into a buffer of this capacity avoids regrowing it
+_PNG_BUFFER_SIZE = 16 * 1024
+# The diagram only uses a handful of colors plus their anti-aliasing shades, so
+# a palette PNG is about half the size of a truecolor one
+_PNG_COLORS = 32
+
+
+# Styles shared by every render
+_THREAD = {"face": "white", "edge": "gray", "hatch": "////"}
+_DIM = {"color": "red"}
+_LABEL_RIGHT = {"color": "red", "ha": "left", "va": "center"}
+_LABEL_LEFT = {"color": "red", "ha": "right", "va": "center"}
+_LABEL_BELOW = {"color": "red", "ha": "center", "va": "top"}
+_LABEL_ABOVE = {"color": "red", "ha": "center", "va": "bottom"}
+_NOTE = {"color": "blue", "ha": "left", "va": "baseline"}
+# Matplotlib copies arrowprops, so a single dict can be shared
+_ARROWPROPS = {"arrowstyle": "<->", **_DIM}
+
+
+def validate_inputs(
+    bolt_type: str, D: float, S: float, C: float, T: float, closing_angle: float | None = 180.0
+) -> str:
+    """Return an error message if the parameters are invalid.
+
+    Only J bolts use ``closing_angle``; it may be ``None`` for L bolts.
+    """
+    if bolt_type.upper() == "J" and closing_angle is None:
+        return "J bolts need a closing angle."
+    if any(val <= 0 for val in (D, S, C, T)):
+        return "All dimensions must be positive values."
+    if T > S:
+        return "Thread length T cannot exceed shaft length."
+    if bolt_type.upper() == "L" and C + T > S + C:
+        return "For L bolts, C + T must not exceed total length."
+    return ""
+
+
+def quantize(value: float, units: str = "mm") -> float:
+    """Round a dimension given in ``units`` to a step of at most 0.001 mm.
+
+    The rounding happens in decimal places of the user's unit (three for mm,
+    six for meters, ...), so a value typed with fewer decimals is returned
+    unchanged and the labels show exactly what the user entered.
+    """
+    factor = UNIT_TO_MM.get(units, 1.0)
+    return round(value, _CACHE_DECIMALS_MM + ceil(log10(factor)))
+
+
+def build_primitives(
+    bolt_type: str,
+    D: float,
+    S: float,
+    C: float,
+    T: float,
+    closing_angle: float = 180.0,
+    *,
+    units: str = "mm",
+) -> tuple[list, tuple[float, float, float, float]]:
+    """Return the drawing primitives of the bolt and the view limits.
+
+    Each primitive is a ``(kind, coords, style)`` tuple in millimeters with the
+    y axis pointing up. The limits are ``(xmin, xmax, ymin, ymax)``.
+    """
+
+    factor = UNIT_TO_MM.get(units, 1.0)
+    D_mm = D * factor
+    S_mm = S * factor
+    C_mm = C * factor
+    T_mm = T * factor
+    bt = bolt_type.upper()
+
+    prims = []
+    body = {"color": "black", "width": D_mm}
+    offset = max(D_mm * 1.5, 20)
+
+    # vertical shaft
+    prims.append(("line", ((0, 0), (0, S_mm)), body))
+
+    if bt == "L":
+        # simple 90° hook
+        prims.append(("line", ((0, 0), (-C_mm, 0)), body))
+        arc_length = C_mm
+        end_x = -C_mm
+        bottom_y = 0
+    else:
+        # curved J hook, centered at (-r, 0) and starting at the shaft
+        r = 4 * D_mm
+        angle_rad = radians(closing_angle)
+        prims.append(("arc", (-r, 0, r, -closing_angle, 0.0), body))
+        arc_length = r * angle_rad
+        end_x = -r * (1 - cos(angle_rad))
+        end_y = -r * sin(angle_rad)
+        if C_mm > arc_length:
+            extra = C_mm - arc_length
+            dx = -sin(angle_rad)
+            dy = -cos(angle_rad)
+            prims.append(
+                ("line", ((end_x, end_y), (end_x + dx * extra, end_y + dy * extra)), body)
+            )
+            end_x += dx * extra
+            end_y += dy * extra
+        bottom_y = -r * sin(min(angle_rad, pi / 2))
+
+    L_total = S_mm + arc_length
+
+    # threaded region aligned with shaft width
+    if T_mm > 0:
+        prims.append(("rect", (-D_mm / 2, S_mm - T_mm, D_mm, T_mm), _THREAD))
+
+    right = D_mm / 2 + offset
+    left = end_x - offset
+
+    # total length
+    prims.append(("dim", ((right, bottom_y), (right, S_mm)), _DIM))
+    prims.append(
+        (
+            "text",
+            (right + 2, (S_mm + bottom_y) / 2, f"L_total: {L_total:.1f} mm"),
+            _LABEL_RIGHT,
+        )
+    )
+
+    # thread length
+    prims.append(("dim", ((left, S_mm - T_mm), (left, S_mm)), _DIM))
+    prims.append(("text", (left - 2, S_mm - T_mm / 2, f"T: {T} {units}"), _LABEL_LEFT))
+
+    # hook length
+    hook_y = bottom_y - offset * 0.3
+    prims.append(("dim", ((0, hook_y), (end_x, hook_y)), _DIM))
+    prims.append(("text", (end_x / 2, hook_y - 2, f"C: {C} {units}"), _LABEL_BELOW))
+
+    # diameter
+    diam_y = S_mm + offset * 0.3
+    prims.append(("dim", ((-D_mm / 2, diam_y), (D_mm / 2, diam_y)), _DIM))
+    prims.append(("text", (0, diam_y + 2, f"D: {D} {units}"), _LABEL_ABOVE))
+
+    limits = (
+        left - offset * 0.2,
+        right + offset,
+        bottom_y - offset * 0.5,
+        S_mm + offset * 0.5,
+    )
+
+    # Notes are stacked one text line apart; the font only grows once the
+    # labels widen the view, so leave some headroom
+    line = 2 * label_font(limits)
+    note_y = S_mm + offset * 0.1
+    if bt == "J":
+        prims.append(("text", (left, note_y, f"Arc Length: {arc_length:.1f} mm"), _NOTE))
+        note_y -= line
+    prims.append(("text", (left, note_y, f"Total Length: {L_total:.1f} mm"), _NOTE))
+    return prims, limits
+
+
+# SVG fragments are %-templates built once; coordinates use two decimals
+_SVG_LINE = '<line x1="%.2f" y1="%.2f" x2="%.2f" y2="%.2f" stroke="%s" stroke-width="%.2f"/>'
+_SVG_ARC = '<path d="%s" fill="none" stroke="%s" stroke-width="%.2f"/>'
+_SVG_RECT = (
+    '<rect x="%.2f" y="%.2f" width="%.2f" height="%.2f" fill="%s" stroke="%s" '
+    'stroke-width="%.2f"/>'
+)
+_SVG_HATCH = '<rect x="%.2f" y="%.2f" width="%.2f" height="%.2f" fill="url(#hatch)"/>'
+_SVG_DIM = (
+    '<line x1="%.2f" y1="%.2f" x2="%.2f" y2="%.2f" stroke="%s" stroke-width="%.2f" '
+    'marker-start="url(#arrow)" marker-end="url(#arrow)"/>'
+)
+
+
+def _labels(prims: list) -> list:
+    """Return the text primitives as ``(x, y, text, ha, va)`` label tuples."""
+    return [(*coords, style["ha"], style["va"]) for kind, coords, style in prims if kind == "text"]
+
+
+def primitives_to_svg(prims: list, limits: tuple[float, float, float, float]) -> str:
+    """Format primitives from :func:`build_primitives` as an inline SVG string."""
+
+    # Same proportions as the 5x6 inch Matplotlib figure with 10 pt text
+    scale = 540 / max(limits[1] - limits[0], limits[3] - limits[2])
+    font = 13 / scale
+    thin = 1 / scale
+    xmin, xmax, ymin, ymax = label_bounds(_labels(prims), limits, font)
+
+    width = xmax - xmin
+    height = ymax - ymin
+    parts = [
+        SVG_HEADER
+        % {
+            "px_w": width * scale,
+            "px_h": height * scale,
+            "x": xmin,
+            "y": -ymax,
+            "w": width,
+            "h": height,
+            "font": font,
+            "hatch": font / 2,
+            "thin": thin,
+        }
+    ]
+    for kind, coords, style in prims:
+        if kind == "line":
+            (x1, y1), (x2, y2) = coords
+            parts.append(_SVG_LINE % (x1, -y1, x2, -y2, style["color"], style["width"]))
+        elif kind == "arc":
+            parts.append(_SVG_ARC % (svg_arc_path(*coords), style["color"], style["width"]))
+        elif kind == "rect":
+            x, y, w, h = coords
+            parts.append(_SVG_RECT % (x, -(y + h), w, h, style["face"], style["edge"], thin))
+            if style.get("hatch"):
+                parts.append(_SVG_HATCH % (x, -(y + h), w, h))
+        elif kind == "dim":
+            (x1, y1), (x2, y2) = coords
+            parts.append(_SVG_DIM % (x1, -y1, x2, -y2, style["color"], thin))
+        elif kind == "text":
+            x, y, text = coords
+            parts.append(svg_text(x, y, text, style["ha"], style["va"], style["color"]))
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def draw_bolt_diagram(
+    bolt_type: str,
+    D: float,
+    S: float,
+    C: float,
+    T: float,
+    closing_angle: float = 180.0,
+    *,
+    units: str = "mm",
+) -> bytes:
+    """Return PNG bytes with a 2D technical diagram of an anchor bolt."""
+    return _cached_png(
+        bolt_type.upper(),
+        quantize(D, units),
+        quantize(S, units),
+        quantize(C, units),
+        quantize(T, units),
+        round(closing_angle, _CACHE_DECIMALS_MM),
+        units,
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_png(
+    bolt_type: str,
+    D: float,
+    S: float,
+    C: float,
+    T: float,
+    closing_angle: float,
+    units: str,
+) -> bytes:
+    """Render the PNG; results are memoized since the drawing is a pure function."""
+
+    prims, limits = build_primitives(bolt_type, D, S, C, T, closing_angle, units=units)
+    # No bbox_inches="tight" pass: reserve room for the labels in the limits
+    # instead
+    view = fit_labels(_labels(prims), limits)
+    xmin, xmax, ymin, ymax = view
+    font = label_font(view)
+
+    with _LOCK:
+        ax = _AX
+        ax.cla()
+        ax.set_aspect("equal")
+
+        # Straight body segments are batched into a single collection
+        segments = []
+        colors = []
+        widths = []
+        for kind, coords, style in prims:
+            if kind == "line":
+                segments.append(coords)
+                colors.append(style["color"])
+                widths.append(style["width"])
+            elif kind == "arc":
+                cx, cy, r, theta1, theta2 = coords
+                ax.add_patch(
+                    patches.Arc(
+                        (cx, cy),
+                        2 * r,
+                        2 * r,
+                        theta1=theta1,
+                        theta2=theta2,
+                        color=style["color"],
+                        linewidth=style["width"],
+                        capstyle="butt",
+                    )
+                )
+            elif kind == "rect":
+                x, y, w, h = coords
+                ax.add_patch(
+                    patches.Rectangle(
+                        (x, y), w, h, facecolor=style["face"], edgecolor=style["edge"]
+                    )
+                )
+                if style.get("hatch"):
+                    # Explicit hatch lines, same spacing as the SVG pattern;
+                    # cheaper than Agg's hatch engine
+                    ax.add_collection(
+                        LineCollection(
+                            hatch_segments(x, y, w, h, font / 2),
+                            colors=style["edge"],
+                            linewidths=0.5,
+                            zorder=1,
+                        )
+                    )
+            elif kind == "dim":
+                xy, xytext = coords
+                ax.annotate(
+                    "",
+                    xy=xy,
+                    xytext=xytext,
+                    arrowprops=_ARROWPROPS,
+                )
+            elif kind == "text":
+                x, y, text = coords
+                ax.text(x, y, text, color=style["color"], ha=style["ha"], va=style["va"])
+        ax.add_collection(
+            LineCollection(segments, colors=colors, linewidths=widths, capstyle="butt", zorder=2)
+        )
+
+        ax.axis("off")
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(ymin, ymax)
+
+        _FIG.canvas.draw()
+        image = Image.frombuffer(
+            "RGBA", _FIG.canvas.get_width_height(), _FIG.canvas.buffer_rgba(), "raw", "RGBA", 0, 1
+        )
+        image = image.convert("RGB").quantize(colors=_PNG_COLORS)
+
+    buf = io.BytesIO(bytes(_PNG_BUFFER_SIZE))
+    image.save(buf, format="png")
+    return buf.getbuffer()[: buf.tell()].tobytes()
+
+
+@functools.lru_cache(maxsize=128)
+def draw_bolt_svg(
+    bolt_type: str,
+    D: float,
+    S: float,
+    C: float,
+    T: float,
+    closing_angle: float = 180.0,
+    *,
+    units: str = "mm",
+) -> str:
+    """Return an inline SVG string with the same diagram as :func:`draw_bolt_diagram`."""
+    return primitives_to_svg(*build_primitives(bolt_type, D, S, C, T, closing_angle, units=units))
@@ -0,0 +1,122 @@
+"""Geometry and SVG helpers shared by the FastAPI and Gradio renderers.
+
+Both renderers draw on a 5x6 inch figure with 10 pt text and describe labels
+as ``(x, y, text, ha, va)`` tuples in data units, with the y axis pointing up.
+"""
+
+from html import escape
+from math import cos, radians, sin, sqrt
+
+# Size of the axes box in inches (5x6 inch figure with 5 % margins)
+AX_SIZE = (5 * 0.9, 6 * 0.9)
+# Fraction of the estimated text box lying left of / below the anchor point
+TEXT_HA = {"left": 0.0, "center": 0.5, "right": 1.0}
+TEXT_VA = {"baseline": 0.2, "center": 0.5, "top": 1.0, "bottom": 0.0}
+
+# SVG equivalents of the Matplotlib text alignments
+SVG_ANCHOR = {"left": "start", "center": "middle", "right": "end"}
+SVG_BASELINE = {
+    "baseline": "auto",
+    "center": "central",
+    "top": "hanging",
+    "bottom": "text-after-edge",
+}
+
+# Opening tag and definitions of every SVG: open dimension arrows and the
+# "////" thread hatch. Coordinates use two decimals, well below a pixel
+SVG_HEADER = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="%(px_w).0f" height="%(px_h).0f" '
+    'viewBox="%(x).2f %(y).2f %(w).2f %(h).2f" '
+    'font-family="sans-serif" font-size="%(font).2f">'
+    "<defs>"
+    '<marker id="arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" '
+    'markerHeight="8" orient="auto-start-reverse">'
+    '<path d="M0,0 L10,5 L0,10" fill="none" stroke="red"/></marker>'
+    '<pattern id="hatch" patternUnits="userSpaceOnUse" width="%(hatch).2f" '
+    'height="%(hatch).2f" patternTransform="rotate(45)">'
+    '<line x1="0" y1="0" x2="0" y2="%(hatch).2f" stroke="gray" '
+    'stroke-width="%(thin).2f"/></pattern>'
+    "</defs>"
+)
+_SVG_MOVE = "M%.2f,%.2f"
+_SVG_ARC_TO = " A%.2f,%.2f 0 %d 0 %.2f,%.2f"
+_SVG_TEXT = '<text x="%.2f" y="%.2f"%s text-anchor="%s" dominant-baseline="%s">%s</text>'
+
+
+def label_font(view: tuple[float, float, float, float]) -> float:
+    """Return the height of a 10 pt text in data units for the limits ``view``."""
+    xmin, xmax, ymin, ymax = view
+    return 10 / 72 * max((xmax - xmin) / AX_SIZE[0], (ymax - ymin) / AX_SIZE[1])
+
+
+def label_bounds(
+    labels, limits: tuple[float, float, float, float], font: float
+) -> tuple[float, float, float, float]:
+    """Grow ``limits`` by the estimated box of every label.
+
+    ``font`` is the text height in data units; the width is estimated from the
+    character count.
+    """
+    xmin, xmax, ymin, ymax = limits
+    for x, y, text, ha, va in labels:
+        w = len(text) * font * 0.6
+        x0 = x - w * TEXT_HA[ha]
+        y0 = y - font * TEXT_VA[va]
+        xmin, xmax = min(xmin, x0), max(xmax, x0 + w)
+        ymin, ymax = min(ymin, y0), max(ymax, y0 + font)
+    return xmin, xmax, ymin, ymax
+
+
+def fit_labels(
+    labels, limits: tuple[float, float, float, float]
+) -> tuple[float, float, float, float]:
+    """Return PNG axes limits that make room for the 10 pt labels.
+
+    Replaces ``bbox_inches="tight"``, which draws the figure twice. The font
+    size in data units depends on the final limits, so the estimate is
+    refined once.
+    """
+    view = limits
+    for _ in range(2):
+        view = label_bounds(labels, limits, label_font(view))
+    return view
+
+
+def hatch_segments(x: float, y: float, w: float, h: float, spacing: float) -> list:
+    """Return the 45° hatch lines ("////") that fill a rectangle.
+
+    ``spacing`` is the perpendicular distance between consecutive lines.
+    """
+    segments = []
+    # Lines are y = x + k; sweep k over every value crossing the rectangle
+    step = spacing * sqrt(2)
+    k = y - (x + w) + step
+    while k < y + h - x:
+        x_start = max(x, y - k)
+        x_end = min(x + w, y + h - k)
+        segments.append(((x_start, x_start + k), (x_end, x_end + k)))
+        k += step
+    return segments
+
+
+def svg_arc_path(cx: float, cy: float, r: float, theta1: float, theta2: float) -> str:
+    """Return the ``d`` attribute of a circular arc, like Matplotlib's ``Arc``.
+
+    The arc runs counterclockwise from ``theta1`` to ``theta2`` degrees. An SVG
+    arc whose start and end coincide is not drawn, so from 360° on the arc is
+    split in two halves.
+    """
+    sweep = theta2 - theta1
+    stops = (theta2,) if sweep < 360 else (theta1 + sweep / 2, theta2)
+    large = sweep / len(stops) > 180
+    t1 = radians(theta1)
+    return _SVG_MOVE % (cx + r * cos(t1), -(cy + r * sin(t1))) + "".join(
+        _SVG_ARC_TO % (r, r, large, cx + r * cos(radians(t)), -(cy + r * sin(radians(t))))
+        for t in stops
+    )
+
+
+def svg_text(x: float, y: float, text: str, ha: str, va: str, fill: str | None = None) -> str:
+    """Return an escaped SVG ``<text>`` element; ``y`` points up as in the drawing."""
+    fill_attr = ' fill="%s"' % fill if fill else ""
+    return _SVG_TEXT % (x, -y, fill_attr, SVG_ANCHOR[ha], SVG_BASELINE[va], escape(text))
@@ -1,175 +1,66 @@
-"""Interactive Gradio app that renders anchor bolts with Matplotlib."""
+"""Interactive Gradio app that renders anchor bolts as SVG and PNG."""
 
-import io
-from math import radians
+import atexit
+import hashlib
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import numpy as np
 import gradio as gr
 
-# Conversion factors from different units to millimeters
-UNIT_TO_MM = {
-    "mm": 1.0,
-    "cm": 10.0,
-    "inches": 25.4,
-    "meters": 1000.0,
-    "feet": 304.8,
-}
-
-
-def validate_inputs(bolt_type: str, D: float, S: float, C: float, T: float) -> str:
-    """Return an error message if the parameters are invalid."""
-    if any(val <= 0 for val in (D, S, C, T)):
-        return "All dimensions must be positive values."
-    if T > S:
-        return "Thread length T cannot exceed shaft length."
-    if bolt_type.upper() == "L" and C + T > S + C:
-        return "For L bolts, C + T must not exceed total length."
-    return ""
-
-
-def draw_bolt_diagram(
-    bolt_type: str,
-    D: float,
-    S: float,
-    C: float,
-    T: float,
-    closing_angle: float = 180.0,
-    *,
-    units: str = "mm",
-) -> bytes:
-    """Return PNG bytes with a 2D technical diagram of an anchor bolt."""
-
-    factor = UNIT_TO_MM.get(units, 1.0)
-    D_mm = D * factor
-    S_mm = S * factor
-    C_mm = C * factor
-    T_mm = T * factor
-
-    fig, ax = plt.subplots(figsize=(5, 6))
-    ax.set_aspect("equal")
-
-    offset = max(D_mm * 1.5, 20)
-
-    # vertical shaft
-    ax.plot([0, 0], [0, S_mm], color="black", linewidth=D_mm, solid_capstyle="butt")
-
-    if bolt_type.upper() == "L":
-        # simple 90° hook
-        ax.plot([0, -C_mm], [0, 0], color="black", linewidth=D_mm, solid_capstyle="butt")
-        arc_length = C_mm
-        end_x = -C_mm
-        bottom_y = 0
+from bolt_render import draw_bolt_diagram, draw_bolt_svg, quantize, validate_inputs
+
+# Files served by the download buttons, one folder per parameter set. Gradio
+# copies them into its own cache, so only the most recent folders are kept.
+# The directory is created on the first download and removed at exit.
+_DOWNLOAD_DIR: Path | None = None
+_MAX_DOWNLOADS = 16
+_DOWNLOADS: OrderedDict[str, Path] = OrderedDict()
+_DOWNLOADS_LOCK = threading.Lock()
+
+
+def _download_file(
+    fmt: str, bt: str, d: float, s: float, c: float, t: float, angle: float, unit: str
+) -> str:
+    """Write the ``fmt`` ("png" or "svg") file offered for download and return its path."""
+    global _DOWNLOAD_DIR
+    key = hashlib.sha1(repr((bt, d, s, c, t, angle, unit)).encode()).hexdigest()[:16]
+    # Render outside the lock; both renderers are memoized
+    if fmt == "png":
+        data = draw_bolt_diagram(bt, d, s, c, t, angle, units=unit)
     else:
-        # curved J hook
-        r = 4 * D_mm
-        angle_rad = radians(closing_angle)
-        theta = np.linspace(0.0, angle_rad, 60)
-        arc_x = -r * (1 - np.cos(theta))
-        arc_y = -r * np.sin(theta)
-        ax.plot(arc_x, arc_y, color="black", linewidth=D_mm, solid_capstyle="butt")
-        arc_length = r * angle_rad
-        end_x = arc_x[-1]
-        end_y = arc_y[-1]
-        if C_mm > arc_length:
-            extra = C_mm - arc_length
-            dx = -np.sin(angle_rad)
-            dy = -np.cos(angle_rad)
-            ax.plot(
-                [end_x, end_x + dx * extra],
-                [end_y, end_y + dy * extra],
-                color="black",
-                linewidth=D_mm,
-                solid_capstyle="butt",
-            )
-            end_x += dx * extra
-            end_y += dy * extra
-        bottom_y = arc_y.min()
-
-    L_total = S_mm + arc_length
-
-    # threaded region aligned with shaft width
-    if T_mm > 0:
-        thread = patches.Rectangle(
-            (-D_mm / 2, S_mm - T_mm),
-            D_mm,
-            T_mm,
-            facecolor="white",
-            edgecolor="gray",
-            hatch="////",
-        )
-        ax.add_patch(thread)
-
-    right = D_mm / 2 + offset
-    left = end_x - offset
-
-    # total length
-    ax.annotate(
-        "",
-        xy=(right, bottom_y),
-        xytext=(right, S_mm),
-        arrowprops=dict(arrowstyle="<->", color="red"),
-    )
-    ax.text(
-        right + 2,
-        (S_mm + bottom_y) / 2,
-        f"L_total: {L_total:.1f} mm",
-        color="red",
-        va="center",
-    )
-
-    # thread length
-    ax.annotate(
-        "",
-        xy=(left, S_mm - T_mm),
-        xytext=(left, S_mm),
-        arrowprops=dict(arrowstyle="<->", color="red"),
-    )
-    ax.text(
-        left - 2,
-        S_mm - T_mm / 2,
-        f"T: {T} {units}",
-        color="red",
-        ha="right",
-        va="center",
-    )
-
-    # hook length
-    hook_y = bottom_y - offset * 0.3
-    ax.annotate(
-        "",
-        xy=(0, hook_y),
-        xytext=(end_x, hook_y),
-        arrowprops=dict(arrowstyle="<->", color="red"),
-    )
-    ax.text(end_x / 2, hook_y - 2, f"C: {C} {units}", color="red", ha="center", va="top")
-
-    # diameter
-    diam_y = S_mm + offset * 0.3
-    ax.annotate(
-        "",
-        xy=(-D_mm / 2, diam_y),
-        xytext=(D_mm / 2, diam_y),
-        arrowprops=dict(arrowstyle="<->", color="red"),
-    )
-    ax.text(0, diam_y + 2, f"D: {D} {units}", color="red", ha="center", va="bottom")
-
-    if bolt_type.upper() == "J":
-        ax.text(left, S_mm + offset * 0.1, f"Arc Length: {arc_length:.1f} mm", color="blue")
-    ax.text(left, S_mm + offset * 0.1 - 10, f"Total Length: {L_total:.1f} mm", color="blue")
-
-    ax.axis("off")
-    ax.set_xlim(left - offset * 0.2, right + offset)
-    ax.set_ylim(bottom_y - offset * 0.5, S_mm + offset * 0.5)
-
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", dpi=150, bbox_inches="tight")
-    plt.close(fig)
-    buf.seek(0)
-    return buf.getvalue()
+        data = draw_bolt_svg(bt, d, s, c, t, angle, units=unit).encode()
+    # The folder is created, evicted and written under the lock, so no file
+    # is removed or read while it is being written
+    with _DOWNLOADS_LOCK:
+        if _DOWNLOAD_DIR is None:
+            _DOWNLOAD_DIR = Path(tempfile.mkdtemp(prefix="visual-bolt-"))
+            atexit.register(shutil.rmtree, _DOWNLOAD_DIR, ignore_errors=True)
+        folder = _DOWNLOADS.pop(key, None) or _DOWNLOAD_DIR / key
+        _DOWNLOADS[key] = folder
+        while len(_DOWNLOADS) > _MAX_DOWNLOADS:
+            shutil.rmtree(_DOWNLOADS.popitem(last=False)[1], ignore_errors=True)
+        folder.mkdir(exist_ok=True)
+        path = folder / f"bolt.{fmt}"
+        if not path.exists():
+            path.write_bytes(data)
+    return str(path)
+
+
+def _quantized(
+    bt: str, d: float, s: float, c: float, t: float, angle: float | None, unit: str
+) -> tuple:
+    """Return the drawing parameters rounded so that near-identical inputs share a cache entry.
+
+    Lengths are quantized in millimeters, so values typed with fewer decimals
+    reach the labels as is. L bolts ignore the closing angle, which may be
+    left empty; it is replaced by the default so they share cache entries.
+    """
+    d, s, c, t = (quantize(v, unit) for v in (d, s, c, t))
+    angle = round(angle, 3) if bt.upper() == "J" else 180.0
+    return bt, d, s, c, t, angle
 
 
 def main() -> None:
@@ -194,24 +85,50 @@ def main() -> None:
 
             with gr.Column():
                 warning = gr.Markdown(visible=False)
-                output_img = gr.Image(label="Diagram")
-                download = gr.DownloadButton(label="Download PNG", filename="bolt.png")
+                output_img = gr.HTML(label="Diagram")
+                with gr.Row():
+                    download = gr.Button("Download PNG")
+                    download_svg = gr.Button("Download SVG")
+                download_file = gr.File(label="Download", visible=False, interactive=False)
 
         def refresh(bt, d, s, c, t, angle, unit):
-            err = validate_inputs(bt, d, s, c, t)
+            err = validate_inputs(bt, d, s, c, t, angle)
             if err:
-                return gr.update(value=f"**Error:** {err}", visible=True), None, None
-            png = draw_bolt_diagram(bt, d, s, c, t, angle, units=unit)
-            return gr.update(visible=False), png, png
+                no_file = gr.update(value=None, visible=False)
+                return gr.update(value=f"**Error:** {err}", visible=True), None, no_file
+            svg = draw_bolt_svg(*_quantized(bt, d, s, c, t, angle, unit), units=unit)
+            # Hide the link to a download made for the previous parameters
+            return gr.update(visible=False), svg, gr.update(value=None, visible=False)
+
+        def prepare_download(fmt, bt, d, s, c, t, angle, unit):
+            if validate_inputs(bt, d, s, c, t, angle):
+                return gr.update(value=None, visible=False)
+            path = _download_file(fmt, *_quantized(bt, d, s, c, t, angle, unit), unit)
+            return gr.update(value=path, visible=True)
 
         inputs = [bolt_type, D, S_val, C, T, closing_angle, units]
 
-        for comp in inputs:
-            comp.change(
-                refresh,
-                inputs=inputs,
-                outputs=[warning, output_img, download],
-            )
+        # A single listener for every input lets Gradio coalesce bursts of
+        # changes. Only the SVG preview is drawn here and any previous download
+        # is hidden; the files are written when a download button is clicked
+        gr.on(
+            triggers=[comp.change for comp in inputs],
+            fn=refresh,
+            inputs=inputs,
+            outputs=[warning, output_img, download_file],
+            show_progress="hidden",
+            trigger_mode="always_last",
+        )
+        download.click(
+            lambda *args: prepare_download("png", *args),
+            inputs=inputs,
+            outputs=download_file,
+        )
+        download_svg.click(
+            lambda *args: prepare_download("svg", *args),
+            inputs=inputs,
+            outputs=download_file,
+        )
 
         bolt_type.change(
             lambda b: gr.update(visible=b == "J"),
@@ -223,4 +140,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,26 +1,262 @@
 """Servidor FastAPI que genera un boceto tecnico de pernos de anclaje.
 
-Se usa matplotlib para dibujar en 2D un perno tipo "L" o tipo "J" con sus
-cotas de diametro, largo total, gancho y longitud de rosca. El resultado se
-entrega como una imagen PNG descargable desde el navegador.
+Se dibuja en 2D un perno tipo "L" o tipo "J" con sus cotas de diametro, largo
+total, gancho y longitud de rosca. El resultado se entrega como un SVG armado
+como texto, o como un PNG dibujado con matplotlib para descargarlo.
 """
 
-from fastapi import FastAPI, Query
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, Response
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+import functools
+import gzip
+import hashlib
+import html
 import io
 import math
+import multiprocessing
+import os
+import threading
 
-# Matplotlib se emplea en modo "Agg" para que funcione sin servidor de ventanas
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+# Se usa el lienzo Agg de matplotlib directamente, sin pyplot: no hay estado
+# global de figuras y funciona sin servidor de ventanas
 import matplotlib.patches as patches
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.figure import Figure
+from matplotlib.path import Path as MplPath
+from matplotlib.transforms import Affine2D
+from PIL import Image
+
+from drawing import (
+    SVG_HEADER,
+    fit_labels,
+    hatch_segments,
+    label_bounds,
+    label_font,
+    svg_arc_path,
+    svg_text,
+)
+
+# brotli es opcional; sin el paquete el SVG solo se ofrece con gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 app = FastAPI()
 
 # Ruta al archivo HTML con el formulario
 HTML_PATH = Path(__file__).parent / "static" / "index.html"
+# El formulario no cambia mientras corre el servidor; se lee una sola vez y
+# se guarda ya en bytes, listo para enviarse sin volver a codificarlo
+INDEX_HTML = HTML_PATH.read_bytes()
+INDEX_ETAG = '"%s"' % hashlib.blake2b(INDEX_HTML, digest_size=16).hexdigest()
+# El navegador puede reutilizar el formulario durante una hora y despues
+# revalidarlo con el ETag
+INDEX_HEADERS = {"Cache-Control": "public, max-age=3600", "ETag": INDEX_ETAG}
+
+# Pagina de resultado de /draw; solo cambia la consulta de la imagen
+DRAW_PAGE = (
+    "<h1>Boceto generado</h1>"
+    '<img src="/image?%(query)s" alt="boceto"><br>'
+    '<a href="/image?%(query)s&amp;fmt=png" download="bolt.png">Descargar PNG</a> '
+    '<a href="/image?%(query)s" download="bolt.svg">Descargar SVG</a>'
+    '<p><a href="/">Volver</a></p>'
+)
+
+# Decimales con los que se comparan las medidas en la cache y el ETag; las
+# cotas muestran el valor redondeado
+CACHE_DECIMALS = 3
+
+# Tamano tipico del PNG; se reserva de antemano para no agrandar el buffer
+PNG_BUFFER_SIZE = 16 * 1024
+# El dibujo solo usa negro, gris, rojo y blanco mas sus tonos de suavizado;
+# con una paleta de 32 colores el PNG ocupa mucho menos que en RGBA
+PNG_COLORS = 32
+
+# La imagen solo depende de los parametros de la URL, asi que el navegador
+# puede guardarla indefinidamente
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Codificaciones con las que se precomprime el SVG, en orden de preferencia
+SVG_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Estilo comun de las cotas
+RED = {"color": "red"}
+# Largo y medio ancho, en puntos, de las puntas abiertas de las cotas; son las
+# medidas del estilo "<->" de matplotlib con textos de 10 pt
+ARROW_HEAD = (4.0, 2.0)
+
+# Figura reutilizada por todos los PNG dibujados en un mismo proceso; se evita
+# crear la figura, el lienzo y su buffer RGBA en cada dibujo
+_FIG = Figure(figsize=(5, 6), dpi=90)
+_CANVAS = FigureCanvasAgg(_FIG)
+_AX = _FIG.add_subplot(111)
+_FIG.subplots_adjust(left=0.05, right=0.95, top=0.95, bottom=0.05)
+_AX.set_aspect("equal")
+_AX.axis("off")
+_LOCK = threading.Lock()
+
+# Los PNG se dibujan en procesos aparte: la figura compartida solo admite un
+# dibujo a la vez por proceso y matplotlib retiene el GIL casi todo el tiempo.
+# El grupo se crea con el primer PNG que no esta en la cache, no al importar el
+# modulo; si no se puede usar, los PNG se dibujan en el propio proceso
+_POOL = None
+_POOL_BROKEN = False
+_POOL_LOCK = threading.Lock()
+
+# Los artistas del dibujo tambien se crean una sola vez; cada peticion solo
+# cambia sus coordenadas, sin vaciar los ejes ni construir flechas nuevas
+_HOOK = _AX.add_patch(
+    patches.Arc((0, 0), 1, 1, color="black", capstyle="butt", visible=False)
+)
+# Los tramos rectos del cuerpo se dibujan como una sola coleccion
+_BODY = _AX.add_collection(
+    LineCollection([], colors="black", capstyle="butt", zorder=2), autolim=False
+)
+# Zona roscada en gris con rayado
+_THREAD = _AX.add_patch(
+    patches.Rectangle(
+        (0, 0),
+        1,
+        1,
+        linewidth=0.5,
+        edgecolor="gray",
+        facecolor="white",
+        zorder=3,
+    )
+)
+# Rayado "////" de la rosca como lineas explicitas, con la misma separacion
+# que el patron del SVG; es mas barato que el motor de rayado de Agg
+_HATCH = _AX.add_collection(
+    LineCollection([], colors="gray", linewidths=0.5, zorder=3), autolim=False
+)
+# Las cotas son dos colecciones: todas las lineas juntas y todas las puntas
+# juntas, estas en puntos alrededor de cada extremo
+_DIM_LINES = _AX.add_collection(
+    LineCollection([], linewidths=1.0, zorder=3, **RED), autolim=False
+)
+_DIM_HEADS = _AX.add_collection(
+    PathCollection(
+        [],
+        offsets=[(0, 0)],
+        offset_transform=_AX.transData,
+        transform=Affine2D().scale(_FIG.dpi / 72),
+        facecolors="none",
+        edgecolors="red",
+        linewidths=1.0,
+        zorder=3,
+    ),
+    autolim=False,
+)
+_LABELS = [_AX.text(0, 0, "", **RED) for _ in range(4)]
+
+
+def j_hook(r: float, angle_rad: float):
+    """Calcula el extremo y el punto mas bajo del arco del gancho J.
+
+    El arco se dibuja como un ``Arc`` de matplotlib o un ``<path>`` SVG, por lo
+    que no hace falta muestrear sus puntos; basta con resolver ambos puntos de
+    forma analitica. Tambien se devuelve la tangente unitaria en el extremo,
+    que reutiliza el mismo seno y coseno: ``(end_x, end_y, bottom_y, dx, dy)``.
+    """
+    cos_a = math.cos(angle_rad)
+    sin_a = math.sin(angle_rad)
+    end_x = -r * (1 - cos_a)
+    end_y = -r * sin_a
+    # Pasados los 90 grados el punto mas bajo es el fondo de la circunferencia
+    bottom_y = end_y if angle_rad < math.pi / 2 else -r
+    return end_x, end_y, bottom_y, -sin_a, -cos_a
+
+
+def bolt_geometry(
+    bolt_type: str,
+    D: float,
+    L: float,
+    C: float,
+    T: float,
+    closing_angle: float,
+) -> dict:
+    """Calcula las coordenadas del perno y de sus cotas.
+
+    La comparten el dibujo PNG y el SVG. Devuelve un diccionario con los
+    tramos rectos del cuerpo (``segments``), el arco del gancho J (``arc``,
+    ``None`` en el tipo L), las flechas de cota (``dims``), sus textos
+    (``labels``) y los limites del grafico (``limits``).
+    """
+    # Espaciado alrededor del perno para colocar las cotas
+    offset = max(D * 2.0, 20.0)
+
+    segments = [((0, 0), (0, L))]
+    arc = None
+    lower_limit = -offset * 1.5
+    if bolt_type == "L":
+        segments.append(((0, 0), (-C, 0)))
+        hook_left = -C
+    else:  # tipo J con gancho curvo
+        r = 4 * D
+        angle_rad = math.radians(closing_angle)
+        end_x, end_y, bottom_y, dx, dy = j_hook(r, angle_rad)
+        arc = (r, closing_angle, end_x, end_y)
+
+        arc_length = r * angle_rad
+        if C > arc_length:
+            extra = C - arc_length
+            segments.append(((end_x, end_y), (end_x + dx * extra, end_y + dy * extra)))
+            end_x += dx * extra
+        hook_left = min(end_x, -D / 2)
+        lower_limit = min(lower_limit, bottom_y - offset)
+
+    right = D / 2 + offset
+    left = hook_left - offset
+    y_d = L + offset * 0.2
+
+    # Largo total, longitud de la rosca, gancho y diametro
+    dims = [
+        ((right, 0), (right, L)),
+        ((left, L - T), (left, L)),
+        ((0, -offset / 2), (hook_left, -offset / 2)),
+        ((-D / 2, y_d), (D / 2, y_d)),
+    ]
+    labels = [
+        (right + 2, L / 2, f"L: {L} mm", "left", "center"),
+        (left - 2, L - T / 2, f"T: {T} mm", "right", "center"),
+        (hook_left / 2, -offset / 2 - 2, f"C: {C} mm", "center", "top"),
+        (0, y_d + 2, f"D: {D} mm", "center", "bottom"),
+    ]
+    return {
+        "segments": segments,
+        "arc": arc,
+        "dims": dims,
+        "labels": labels,
+        "limits": (left, right + offset, lower_limit, L + offset * 0.5),
+    }
+
+
+@functools.lru_cache(maxsize=64)
+def arrow_head(ux: float, uy: float) -> MplPath:
+    """Punta abierta de flecha orientada segun la direccion unitaria ``(ux, uy)``.
+
+    Los vertices estan en puntos y son relativos al extremo de la flecha. Las
+    cotas son horizontales o verticales, asi que solo hay unas pocas puntas
+    distintas y se memorizan. La cache se acota igualmente porque las claves
+    son floats calculados.
+    """
+    length, half = ARROW_HEAD
+    back_x, back_y = -ux * length, -uy * length
+    side_x, side_y = -uy * half, ux * half
+    return MplPath(
+        [(back_x + side_x, back_y + side_y), (0, 0), (back_x - side_x, back_y - side_y)],
+        [MplPath.MOVETO, MplPath.LINETO, MplPath.LINETO],
+    )
+
+
+def quantize(*values: float) -> tuple:
+    """Redondea las medidas para que valores casi iguales compartan cache."""
+    return tuple(round(v, CACHE_DECIMALS) for v in values)
 
 
 def draw_bolt_diagram(
@@ -48,131 +284,392 @@ def draw_bolt_diagram(
     closing_angle : float, optional
         Angulo de cierre del gancho en grados (solo para tipo J).
     """
+    # Se normaliza el tipo una sola vez; "l" y "L" comparten la misma entrada
+    return _cached_png(bolt_type.upper(), *quantize(D, L, C, T, closing_angle))
 
-    fig, ax = plt.subplots(figsize=(5, 6))
-    ax.set_aspect("equal")
 
-    # Espaciado alrededor del perno para colocar las cotas
-    offset = max(D * 2.0, 20.0)
+@functools.lru_cache(maxsize=512)
+def _cached_png(
+    bolt_type: str,
+    D: float,
+    L: float,
+    C: float,
+    T: float,
+    closing_angle: float,
+) -> bytes:
+    """Dibuja el perno; el resultado se memoriza porque solo depende de las medidas.
 
-    # --------- Dibujo del perno ---------
-    ax.plot([0, 0], [0, L], color="black", linewidth=D, solid_capstyle="butt")
+    La cache vive en el proceso del servidor; solo los fallos se envian al
+    grupo de procesos, o se dibujan aqui mismo si no hay grupo.
+    """
+    pool = render_pool()
+    if pool is not None:
+        try:
+            return pool.submit(_render_png, bolt_type, D, L, C, T, closing_angle).result()
+        except BrokenProcessPool:
+            discard_pool(pool)
+    return _render_png(bolt_type, D, L, C, T, closing_angle)
 
-    lower_limit = -offset * 1.5
-    if bolt_type.upper() == "L":
-        ax.plot([0, -C], [0, 0], color="black", linewidth=D, solid_capstyle="butt")
-        hook_left = -C
-    else:  # tipo J con gancho curvo
-        r = 4 * D
-        angle_rad = math.radians(closing_angle)
-        steps = 60
-        theta_values = [i * angle_rad / steps for i in range(steps + 1)]
-        arc_x = [-r * (1 - math.cos(t)) for t in theta_values]
-        arc_y = [-r * math.sin(t) for t in theta_values]
-        ax.plot(arc_x, arc_y, color="black", linewidth=D, solid_capstyle="butt")
 
-        arc_length = r * angle_rad
-        if C > arc_length:
-            extra = C - arc_length
-            dx = -r * math.sin(angle_rad)
-            dy = -r * math.cos(angle_rad)
-            norm = math.hypot(dx, dy)
-            end_x = arc_x[-1]
-            end_y = arc_y[-1]
-            line_x = [end_x, end_x + dx / norm * extra]
-            line_y = [end_y, end_y + dy / norm * extra]
-            ax.plot(line_x, line_y, color="black", linewidth=D, solid_capstyle="butt")
-            end_x = line_x[-1]
-        else:
-            end_x = arc_x[-1]
-        hook_left = min(end_x, -D / 2)
-        lower_limit = min(lower_limit, min(arc_y) - offset)
-
-    # Zona roscada en gris con rayado
-    if T > 0:
-        thread = patches.Rectangle(
-            (-D / 2, L - T),
-            D,
-            T,
-            linewidth=0.5,
-            edgecolor="gray",
-            facecolor="white",
-            hatch="////",
-            zorder=3,
-        )
-        ax.add_patch(thread)
-
-    # ----- Cotas -----
-    right = D / 2 + offset
-    left = hook_left - offset
+def render_pool():
+    """Grupo de procesos para los PNG; se crea en el primer uso.
 
-    # Largo total
-    ax.annotate(
-        "",
-        xy=(right, 0),
-        xytext=(right, L),
-        arrowprops=dict(arrowstyle="<->", color="red"),
-    )
-    ax.text(right + 2, L / 2, f"L: {L} mm", color="red", va="center")
-
-    # Longitud de la rosca
-    ax.annotate(
-        "",
-        xy=(left, L - T),
-        xytext=(left, L),
-        arrowprops=dict(arrowstyle="<->", color="red"),
-    )
-    ax.text(left - 2, L - T / 2, f"T: {T} mm", color="red", va="center", ha="right")
-
-    # Gancho (parte inferior)
-    ax.annotate(
-        "",
-        xy=(0, -offset / 2),
-        xytext=(hook_left, -offset / 2),
-        arrowprops=dict(arrowstyle="<->", color="red"),
-    )
-    ax.text(hook_left / 2, -offset / 2 - 2, f"C: {C} mm", color="red", ha="center", va="top")
+    Devuelve ``None`` si el grupo ya se rompio. No se vuelve a crear: la causa
+    mas comun es un script sin ``if __name__ == "__main__":``, cuyos procesos
+    fallan al arrancar y fallarian otra vez.
+    """
+    global _POOL
+    if _POOL_BROKEN:
+        return None
+    with _POOL_LOCK:
+        if _POOL is None and not _POOL_BROKEN:
+            # "spawn" porque el servidor ya tiene hilos al crear los procesos
+            _POOL = ProcessPoolExecutor(
+                max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn")
+            )
+        return _POOL
 
-    # Diametro (debajo del perno)
-    y_d = L + offset * 0.2
-    ax.annotate(
-        "",
-        xy=(-D / 2, y_d),
-        xytext=(D / 2, y_d),
-        arrowprops=dict(arrowstyle="<->", color="red"),
+
+def discard_pool(pool) -> None:
+    """Descarta un grupo roto; desde entonces los PNG se dibujan en este proceso."""
+    global _POOL, _POOL_BROKEN
+    with _POOL_LOCK:
+        _POOL_BROKEN = True
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_png(
+    bolt_type: str,
+    D: float,
+    L: float,
+    C: float,
+    T: float,
+    closing_angle: float,
+) -> bytes:
+    """Dibuja el perno con matplotlib y devuelve los bytes del PNG.
+
+    ``bolt_type`` llega ya en mayusculas desde :func:`draw_bolt_diagram`.
+    """
+
+    geometry = bolt_geometry(bolt_type, D, L, C, T, closing_angle)
+    view = fit_labels(geometry["labels"], geometry["limits"])
+    xmin, xmax, ymin, ymax = view
+    hatch = hatch_segments(-D / 2, L - T, D, T, label_font(view) / 2) if T > 0 else []
+
+    # Una punta en cada extremo de cada cota; las de largo nulo no llevan
+    heads = []
+    tips = []
+    for (x1, y1), (x2, y2) in geometry["dims"]:
+        length = math.hypot(x2 - x1, y2 - y1)
+        if length:
+            ux, uy = (x2 - x1) / length, (y2 - y1) / length
+            heads += [arrow_head(-ux, -uy), arrow_head(ux, uy)]
+            tips += [(x1, y1), (x2, y2)]
+
+    # La figura es compartida por los hilos del proceso: en un proceso del
+    # grupo dibuja uno solo, pero sin grupo pueden coincidir varios hilos de
+    # /image. La codificacion del PNG queda fuera del candado
+    with _LOCK:
+        # --------- Dibujo del perno ---------
+        if geometry["arc"] is not None:
+            r, angle, _, _ = geometry["arc"]
+            _HOOK.set_center((-r, 0))
+            _HOOK.set_width(2 * r)
+            _HOOK.set_height(2 * r)
+            # Arc recalcula su trayectoria al dibujar si cambian los angulos
+            _HOOK.theta1 = -angle
+            _HOOK.theta2 = 0.0
+            _HOOK.set_linewidth(D)
+        _HOOK.set_visible(geometry["arc"] is not None)
+        _BODY.set_segments(geometry["segments"])
+        _BODY.set_linewidth(D)
+        _THREAD.set_bounds(-D / 2, L - T, D, T)
+        _THREAD.set_visible(T > 0)
+        _HATCH.set_segments(hatch)
+
+        # ----- Cotas -----
+        _DIM_LINES.set_segments(geometry["dims"])
+        # Con todas las cotas de largo nulo no hay puntas; set_offsets no admite
+        # una lista vacia, asi que la coleccion solo se oculta
+        if tips:
+            _DIM_HEADS.set_paths(heads)
+            _DIM_HEADS.set_offsets(tips)
+        _DIM_HEADS.set_visible(bool(tips))
+        for label, (x, y, text, ha, va) in zip(_LABELS, geometry["labels"]):
+            label.set_position((x, y))
+            label.set_text(text)
+            label.set_horizontalalignment(ha)
+            label.set_verticalalignment(va)
+
+        # Ajustes finales del grafico
+        _AX.set_xlim(xmin, xmax)
+        _AX.set_ylim(ymin, ymax)
+
+        # print_to_buffer ya dibuja la figura
+        rgba, size = _CANVAS.print_to_buffer()
+
+    image = Image.frombuffer("RGBA", size, rgba, "raw", "RGBA", 0, 1)
+    image = image.convert("RGB").quantize(colors=PNG_COLORS)
+    buffer = io.BytesIO(bytes(PNG_BUFFER_SIZE))
+    # El dibujo es de lineas y se comprime bien incluso con el nivel mas rapido
+    image.save(buffer, format="png", compress_level=1)
+    return buffer.getbuffer()[: buffer.tell()].tobytes()
+
+
+# Plantillas del SVG, armadas una sola vez. Los atributos comunes van en cada
+# grupo; asi cada numero repetido se formatea una sola vez y los elementos solo
+# llevan sus coordenadas
+SVG_TEMPLATE = SVG_HEADER + (
+    '<g fill="none" stroke="black" stroke-width="%(stroke).2f">%(body)s</g>'
+    "%(thread)s"
+    '<g stroke="red" stroke-width="%(thin).2f" '
+    'marker-start="url(#arrow)" marker-end="url(#arrow)">%(dims)s</g>'
+    '<g fill="red">%(labels)s</g>'
+    "</svg>"
+)
+SVG_LINE = '<line x1="%.2f" y1="%.2f" x2="%.2f" y2="%.2f"/>'
+SVG_ARC = '<path d="%s"/>'
+SVG_THREAD = (
+    '<rect x="%(x).2f" y="%(y).2f" width="%(w).2f" height="%(h).2f" fill="white" '
+    'stroke="gray" stroke-width="%(thin).2f"/>'
+    '<rect x="%(x).2f" y="%(y).2f" width="%(w).2f" height="%(h).2f" fill="url(#hatch)"/>'
+)
+
+
+def generate_svg(
+    bolt_type: str,
+    D: float,
+    L: float,
+    C: float,
+    T: float,
+    closing_angle: float,
+) -> str:
+    """Dibuja el perno como texto SVG, sin pasar por matplotlib.
+
+    Usa la misma geometria que el PNG; el navegador se encarga de rasterizar.
+    Las coordenadas y se invierten porque en SVG crecen hacia abajo.
+    """
+    geometry = bolt_geometry(bolt_type, D, L, C, T, closing_angle)
+
+    # Mismas proporciones que la figura de 5x6 pulgadas con textos de 10 pt
+    limits = geometry["limits"]
+    scale = 540 / max(limits[1] - limits[0], limits[3] - limits[2])
+    font = 13 / scale
+    # Grosor de las lineas finas
+    thin = 1 / scale
+    xmin, xmax, ymin, ymax = label_bounds(geometry["labels"], limits, font)
+    width = xmax - xmin
+    height = ymax - ymin
+
+    # --------- Dibujo del perno ---------
+    body = "".join(
+        SVG_LINE % (x1, -y1, x2, -y2) for (x1, y1), (x2, y2) in geometry["segments"]
     )
-    ax.text(0, y_d + 2, f"D: {D} mm", color="red", ha="center", va="bottom")
+    if geometry["arc"] is not None:
+        # Arco centrado en (-r, 0) que termina en el cuerpo, en (0, 0)
+        r, angle, _, _ = geometry["arc"]
+        body += SVG_ARC % svg_arc_path(-r, 0, r, -angle, 0)
 
-    # Ajustes finales del grafico
-    ax.axis("off")
-    ax.set_xlim(left, right + offset)
-    ax.set_ylim(lower_limit, L + offset * 0.5)
+    return SVG_TEMPLATE % {
+        "px_w": width * scale,
+        "px_h": height * scale,
+        "x": xmin,
+        "y": -ymax,
+        "w": width,
+        "h": height,
+        "font": font,
+        "hatch": font / 2,
+        "thin": thin,
+        "stroke": D,
+        "body": body,
+        "thread": (
+            SVG_THREAD % {"x": -D / 2, "y": -L, "w": D, "h": T, "thin": thin} if T > 0 else ""
+        ),
+        # ----- Cotas -----
+        "dims": "".join(
+            SVG_LINE % (x1, -y1, x2, -y2) for (x1, y1), (x2, y2) in geometry["dims"]
+        ),
+        "labels": "".join(
+            svg_text(*label) for label in geometry["labels"]
+        ),
+    }
 
-    buffer = io.BytesIO()
-    fig.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
-    plt.close(fig)
-    buffer.seek(0)
-    return buffer.getvalue()
+
+@functools.lru_cache(maxsize=512)
+def svg_bodies(
+    bolt_type: str,
+    D: float,
+    L: float,
+    C: float,
+    T: float,
+    closing_angle: float,
+) -> dict:
+    """Cuerpos del SVG sin comprimir y precomprimidos con cada codificacion.
+
+    El texto se repite mucho y se comprime varias veces; se hace una sola vez
+    por juego de medidas en lugar de en cada respuesta.
+    """
+    raw = generate_svg(bolt_type, D, L, C, T, closing_angle).encode()
+    bodies = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=6, mtime=0)}
+    if brotli is not None:
+        bodies["br"] = brotli.compress(raw, quality=5)
+    return bodies
 
 
 @app.get("/", response_class=HTMLResponse)
-async def index() -> str:
+async def index(request: Request) -> Response:
     """Retorna el formulario principal."""
-    return HTML_PATH.read_text(encoding="utf-8")
+    if not_modified(request, INDEX_ETAG):
+        return Response(status_code=304, headers=INDEX_HEADERS)
+    return HTMLResponse(INDEX_HTML, headers=INDEX_HEADERS)
 
 
-@app.get("/image")
-async def image(
-    bolt_type: str = Query("L", alias="type"),
-    D: float = Query(20.0, alias="D"),
-    L: float = Query(200.0, alias="L"),
-    C: float = Query(50.0, alias="C"),
-    T: float = Query(50.0, alias="T"),
-    closing_angle: float = Query(180.0, alias="closing_angle"),
-) -> StreamingResponse:
-    """Devuelve la imagen PNG generada."""
-    data = draw_bolt_diagram(bolt_type, D, L, C, T, closing_angle)
-    return StreamingResponse(io.BytesIO(data), media_type="image/png")
+def image_etag(*params) -> str:
+    """ETag de una imagen calculado a partir de sus parametros."""
+    digest = hashlib.blake2b(repr(params).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request: Request, etag: str) -> bool:
+    """Indica si el cliente ya tiene la version identificada por ``etag``."""
+    header = request.headers.get("if-none-match", "")
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+def accepted_values(header: str) -> tuple:
+    """Valores de una cabecera ``Accept``/``Accept-Encoding``.
+
+    Devuelve dos conjuntos: los aceptados (peso no nulo) y los rechazados de
+    forma explicita con ``q=0``, que ``*`` no debe incluir.
+    """
+    accepted = set()
+    refused = set()
+    for item in header.split(","):
+        name, *params = item.split(";")
+        name = name.strip().lower()
+        weight = 1.0
+        # Solo importa el parametro q; los demas (charset, ...) se ignoran. Un
+        # q que no es un numero descarta la entrada
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = None
+        if not name or weight is None:
+            continue
+        if weight == 0:
+            refused.add(name)
+        else:
+            accepted.add(name)
+    return accepted, refused
+
+
+def image_format(request: Request, fmt) -> str:
+    """Formato de la imagen: ``fmt`` de la consulta o, si falta, segun ``Accept``.
+
+    ``fmt`` no distingue mayusculas; otro valor que no sea ``png`` o ``svg``
+    se responde con 422, como las medidas mal escritas.
+
+    Se prefiere el SVG, que no hay que rasterizar; el PNG solo se entrega si
+    el cliente lo pide o no acepta SVG.
+    """
+    if fmt is not None:
+        fmt = fmt.lower()
+        if fmt not in ("png", "svg"):
+            raise HTTPException(422, "fmt debe ser png o svg")
+        return fmt
+    accepted, refused = accepted_values(request.headers.get("accept", "*/*"))
+    # Los comodines no incluyen un tipo rechazado con q=0
+    wildcard = bool(accepted & {"image/*", "*/*"})
+    svg_ok = "image/svg+xml" in accepted or wildcard and "image/svg+xml" not in refused
+    png_ok = "image/png" in accepted or wildcard and "image/png" not in refused
+    return "svg" if svg_ok or not png_ok else "png"
+
+
+def svg_encoding(request: Request) -> str:
+    """Elige la mejor codificacion del SVG que acepta el cliente."""
+    accepted, refused = accepted_values(request.headers.get("accept-encoding", ""))
+    for encoding in SVG_ENCODINGS:
+        if encoding in accepted or ("*" in accepted and encoding not in refused):
+            return encoding
+    return "identity"
+
+
+def query_float(query, name: str, default: float) -> float:
+    """Lee una medida de la consulta; responde 422 si no es un numero."""
+    value = query.get(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise HTTPException(422, f"{name} debe ser un numero") from None
+
+
+@app.get("/image", response_class=Response)
+def image(request: Request) -> Response:
+    """Devuelve la imagen generada.
+
+    Por defecto es un SVG armado como texto; con ``fmt=png``, o si la
+    cabecera ``Accept`` solo admite PNG, se dibuja con matplotlib. Es una
+    funcion sincrona para que FastAPI la ejecute en su pool de hilos: la
+    espera del PNG, que se dibuja en el grupo de procesos, no bloquea el
+    bucle de eventos.
+
+    Es la ruta mas solicitada, asi que los parametros se leen directamente de
+    la consulta en lugar de validarlos con ``Query``. Acepta ``type``, ``D``,
+    ``L``, ``C``, ``T``, ``closing_angle`` y ``fmt``, con los mismos valores
+    por defecto que el formulario.
+    """
+    query = request.query_params
+    bolt_type = query.get("type", "L").upper()
+    D = query_float(query, "D", 20.0)
+    L = query_float(query, "L", 200.0)
+    C = query_float(query, "C", 50.0)
+    T = query_float(query, "T", 50.0)
+    closing_angle = query_float(query, "closing_angle", 180.0)
+    fmt = image_format(request, query.get("fmt"))
+    params = quantize(D, L, C, T, closing_angle)
+    # El PNG ya va comprimido; solo el SVG depende de Accept-Encoding
+    encoding = "identity" if fmt == "png" else svg_encoding(request)
+    etag = image_etag(fmt, encoding, bolt_type, *params)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMAGE_CACHE_CONTROL,
+        "Vary": "Accept, Accept-Encoding",
+    }
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    if fmt == "png":
+        # Los bytes ya estan en memoria; se envian en una sola respuesta
+        data = draw_bolt_diagram(bolt_type, D, L, C, T, closing_angle)
+        return Response(data, media_type="image/png", headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    body = svg_bodies(bolt_type, *params)[encoding]
+    return Response(body, media_type="image/svg+xml", headers=headers)
+
+
+@app.get("/cache_info")
+async def cache_info() -> dict:
+    """Estadisticas de las caches de imagenes generadas."""
+    return {
+        "png": _cached_png.cache_info()._asdict(),
+        "svg": svg_bodies.cache_info()._asdict(),
+    }
+
+
+@functools.lru_cache(maxsize=256)
+def draw_html(query: str) -> str:
+    """Pagina de /draw para una consulta; solo depende de ella y se memoriza.
+
+    La consulta se escapa porque el tipo de perno llega tal cual del usuario.
+    """
+    return DRAW_PAGE % {"query": html.escape(query)}
 
 
 @app.get("/draw", response_class=HTMLResponse)
@@ -188,7 +685,4 @@ async def draw_page(
     query = (
         f"type={bolt_type}&D={D}&L={L}&C={C}&T={T}&closing_angle={closing_angle}"
     )
-    img_tag = f'<img src="/image?{query}" alt="boceto">'
-    download = f'<a href="/image?{query}" download="bolt.png">Descargar imagen</a>'
-    back = '<p><a href="/">Volver</a></p>'
-    return f"<h1>Boceto generado</h1>{img_tag}<br>{download}{back}"
\ No newline at end of file
+    return draw_html(query)
\ No newline at end of file